@@ -1,8 +1,38 @@
+from fastapi import Depends, Path, Request
+from sqlalchemy.orm import Session
+
 from app.internal.database import SessionLocal
+from app.internal.service import ImportGraph, find_environment, read_import_graph
+
+DEFAULT_ENVIRONMENT = "default"
+
+# Lowercase letters, digits, "-" and "_", starting with a letter or digit
+ENVIRONMENT_NAME_PATTERN = r"^[a-z0-9][a-z0-9_-]{0,63}$"
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def validate_environment_name(
+    environment: str = Path(pattern=ENVIRONMENT_NAME_PATTERN, description="Name of the environment")
+) -> None:
+    # Declared by the /environments/{environment}/flags mount, so the shared flag routes stay unaware of it
+    pass
+
+def get_environment_name(request: Request) -> str:
+    # Only the /environments/{environment}/flags mount has the path parameter: the unprefixed
+    # /flags mount always serves the default environment and takes no environment parameter.
+    # Writes pass the name on, so the service creates a new environment with the write itself
+    return request.path_params.get("environment", DEFAULT_ENVIRONMENT)
+
+def get_environment_id(environment: str = Depends(get_environment_name), db: Session = Depends(get_db)) -> int | None:
+    # Read-only: an environment that was never written to has no active flags and no audit logs
+    found = find_environment(environment, db)
+    return found.id if found else None
+
+async def get_import_graph(request: Request) -> ImportGraph:
+    # Parsed as the upload streams in, so the raw body is never held in memory
+    return await read_import_graph(request.stream())
\ No newline at end of file
@@ -13,12 +13,21 @@ flag_dependencies_association = Table(
 )
 
 
+class Environment(Base):
+    __tablename__ = "environments"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(index=True, unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Environment(id={self.id}, name='{self.name}')>"
+
+
 class Flag(Base):
     __tablename__ = "flags"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(index=True, unique=True, nullable=False)
-    is_active: Mapped[bool] = mapped_column(default=False)
 
     dependencies = relationship(
         "Flag",
@@ -31,13 +40,26 @@ class Flag(Base):
     def __repr__(self):
         # Get the names of the dependencies, or an empty list if there are none
         dependency_names = [dep.name for dep in self.dependencies]
-        return f"<Flag(id={self.id}, name='{self.name}', is_active={self.is_active}, dependencies={dependency_names})>"
+        return f"<Flag(id={self.id}, name='{self.name}', dependencies={dependency_names})>"
+
+
+class FlagState(Base):
+    # Per-environment active state; a missing row means the flag is inactive there
+    __tablename__ = "flag_states"
+
+    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id"), primary_key=True)
+    flag_id: Mapped[int] = mapped_column(ForeignKey("flags.id"), primary_key=True, index=True)
+    is_active: Mapped[bool] = mapped_column(default=False, nullable=False)
+
+    def __repr__(self):
+        return f"<FlagState(environment_id={self.environment_id}, flag_id={self.flag_id}, is_active={self.is_active})>"
 
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    environment_id: Mapped[int] = mapped_column(ForeignKey("environments.id"), nullable=False, index=True)
     flag_id: Mapped[int] = mapped_column(ForeignKey("flags.id"), nullable=False, index=True)
     flag_name: Mapped[str] = mapped_column(nullable=False)
     operation: Mapped[str] = mapped_column(nullable=False)  # create, toggle, auto-disable, etc.
@@ -51,4 +73,4 @@ class AuditLog(Base):
     flag = relationship("Flag", backref="audit_logs")
 
     def __repr__(self):
-        return f"<AuditLog(id={self.id}, flag_id={self.flag_id}, operation='{self.operation}', timestamp='{self.timestamp}')>"
+        return f"<AuditLog(id={self.id}, environment_id={self.environment_id}, flag_id={self.flag_id}, operation='{self.operation}', timestamp='{self.timestamp}')>"
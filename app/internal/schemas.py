@@ -3,6 +3,15 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 
 
+class EnvironmentResponse(BaseModel):
+    id: int = Field(..., description="The unique identifier of the environment.")
+    name: str = Field(..., description="The name of the environment.")
+
+    class Config:
+        from_attributes = True
+        orm_mode = True
+
+
 class FlagBody(BaseModel):
     name: str = Field(..., description="The name of the flag.")
     dependencies: list[int] = Field(
@@ -47,6 +56,7 @@ NestedFlagResponse.model_rebuild()
 
 
 class AuditLogCreate(BaseModel):
+    environment_id: int = Field(..., description="The ID of the environment the operation applies to.")
     flag_id: int = Field(..., description="The ID of the flag being audited.")
     flag_name: str = Field(..., description="The name of the flag being audited.")
     operation: str = Field(..., description="The operation performed (create, toggle, auto-disable, etc.).")
@@ -58,6 +68,7 @@ class AuditLogCreate(BaseModel):
 
 class AuditLogResponse(BaseModel):
     id: int = Field(..., description="The unique identifier of the audit log entry.")
+    environment_id: int = Field(..., description="The ID of the environment the operation applied to.")
     flag_id: int = Field(..., description="The ID of the flag being audited.")
     flag_name: str = Field(..., description="The name of the flag being audited.")
     operation: str = Field(..., description="The operation performed.")
@@ -69,4 +80,11 @@ class AuditLogResponse(BaseModel):
 
     class Config:
         from_attributes = True
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class ImportSummary(BaseModel):
+    flags: int = Field(..., description="Number of flags imported.")
+    created_flags: int = Field(..., description="Number of imported flags whose definition did not exist yet.")
+    dependencies: int = Field(..., description="Number of dependency edges imported.")
+    audit_logs: int = Field(..., description="Number of historical audit log entries imported.")
\ No newline at end of file
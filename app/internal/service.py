@@ -1,12 +1,102 @@
+import csv
+import io
 import json
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
 from fastapi import HTTPException
+from sqlalchemy import Table, delete, insert, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.internal.models import Flag, AuditLog
-from app.internal.schemas import FlagBody, FlagResponse, NestedFlagResponse
+from app.internal.models import Environment, Flag, FlagState, AuditLog, flag_dependencies_association
+from app.internal.schemas import FlagBody, FlagResponse, NestedFlagResponse, ImportSummary
+
+# Rows per multi-row INSERT when COPY is not available
+IMPORT_BATCH_SIZE = 1000
+
+# Largest decompressed import accepted; a 100k-flag export is about 12 MiB
+MAX_IMPORT_BYTES = 256 * 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Columns of the audit log records in an export, in COPY order
+AUDIT_LOG_COLUMNS = ("flag_id", "flag_name", "operation", "previous_state", "new_state", "reason", "actor", "timestamp")
+
+
+def find_environment(name: str, db: Session) -> Environment | None:
+    """
+    Gets an environment by name, or None if nothing has been written to it yet.
+    """
+    return db.query(Environment).filter(Environment.name == name).first()
+
+
+def get_or_create_environment(name: str, db: Session) -> Environment:
+    """
+    Gets an environment by name, creating it on first use without committing,
+    so a new environment is only kept if the write that created it is.
+    """
+    environment = find_environment(name, db)
+    if environment:
+        return environment
+    try:
+        # Within a savepoint, so losing a race only undoes this insert
+        with db.begin_nested():
+            environment = Environment(name=name)
+            db.add(environment)
+    except IntegrityError:
+        # Another request created the environment concurrently
+        environment = find_environment(name, db)
+    return environment
+
+
+def get_active_flag_ids(environment_id: int | None, db: Session, flag_ids: list[int] = None) -> set[int]:
+    """
+    Returns the IDs of the flags active in an environment, optionally restricted to flag_ids.
+    The result is a snapshot used to resolve is_active for a whole graph with a single query.
+    An environment_id of None stands for an environment that does not exist yet, where nothing is active.
+    """
+    if environment_id is None:
+        return set()
+    query = db.query(FlagState.flag_id).filter(
+        FlagState.environment_id == environment_id,
+        FlagState.is_active == True
+    )
+    if flag_ids is not None:
+        query = query.filter(FlagState.flag_id.in_(flag_ids))
+    return {flag_id for (flag_id,) in query.all()}
+
+
+def set_flag_active(flag_id: int, environment_id: int, is_active: bool, db: Session) -> None:
+    """
+    Sets a flag's active state in an environment without committing.
+    """
+    state = db.get(FlagState, (environment_id, flag_id))
+    if not state:
+        try:
+            # Within a savepoint, so losing a race only undoes this insert
+            with db.begin_nested():
+                db.add(FlagState(environment_id=environment_id, flag_id=flag_id, is_active=is_active))
+            return
+        except IntegrityError:
+            # Another request inserted the flag's first state concurrently
+            state = db.get(FlagState, (environment_id, flag_id))
+    state.is_active = is_active
+
+
+def flag_state(flag: Flag, active_ids: set[int]) -> dict:
+    """
+    Returns the JSON-serialisable state of a flag recorded in audit logs.
+    """
+    return {
+        "name": flag.name,
+        "is_active": flag.id in active_ids,
+        "dependencies": [dep.id for dep in flag.dependencies]
+    }
 
 
 def log_audit_event(
     db: Session,
+    environment_id: int,
     flag_id: int,
     flag_name: str,
     operation: str,
@@ -19,6 +109,7 @@ def log_audit_event(
     Creates an audit log entry for a flag operation.
     """
     audit_log = AuditLog(
+        environment_id=environment_id,
         flag_id=flag_id,
         flag_name=flag_name,
         operation=operation,
@@ -96,23 +187,24 @@ def validate_dependencies(dependencies: list[int], db: Session) -> list[Flag]:
     return deps
 
 
-def check_dependencies_active(flag: Flag) -> None:
+def check_dependencies_active(flag: Flag, active_ids: set[int]) -> None:
     """
     Checks if all dependencies of a flag are active.
     Raises HTTPException if any dependency is inactive.
     """
-    if not all(dep.is_active for dep in flag.dependencies):
+    if not all(dep.id in active_ids for dep in flag.dependencies):
         raise HTTPException(status_code=400, detail="All dependencies must be active to activate this flag.")
 
 
-def check_no_dependent_flags(flag_id: int, db: Session) -> None:
+def check_no_dependent_flags(flag_id: int, environment_id: int, db: Session) -> None:
     """
-    Checks if any other active flag depends on the given flag.
+    Checks if any other flag active in the environment depends on the given flag.
     Raises HTTPException if dependent flags exist.
     """
-    dependent_flags = db.query(Flag).filter(
+    dependent_flags = db.query(Flag).join(FlagState, FlagState.flag_id == Flag.id).filter(
         Flag.dependencies.any(id=flag_id),
-        Flag.is_active == True
+        FlagState.environment_id == environment_id,
+        FlagState.is_active == True
     ).all()
     if dependent_flags:
         flag_names = [flag.name for flag in dependent_flags]
@@ -124,9 +216,10 @@ def check_no_dependent_flags(flag_id: int, db: Session) -> None:
         raise HTTPException(status_code=400, detail=detail)
 
 
-def create_flag_service(flag_in: FlagBody, db: Session, actor: str = None) -> Flag:
+def create_flag_service(flag_in: FlagBody, environment: str, db: Session, actor: str = None) -> Flag:
     """
     Creates a new flag with validation for duplicates and circular dependencies.
+    The definition is shared by all environments; the flag starts inactive everywhere.
     """
     # Check for duplicate flag name
     existing = db.query(Flag).filter(Flag.name == flag_in.name).first()
@@ -145,6 +238,7 @@ def create_flag_service(flag_in: FlagBody, db: Session, actor: str = None) -> Fl
         deps = validate_dependencies(flag_in.dependencies, db)
         new_flag.dependencies = deps
 
+    environment_id = get_or_create_environment(environment, db).id
     db.add(new_flag)
     db.commit()
     db.refresh(new_flag)
@@ -152,14 +246,11 @@ def create_flag_service(flag_in: FlagBody, db: Session, actor: str = None) -> Fl
     # Log the creation
     log_audit_event(
         db=db,
+        environment_id=environment_id,
         flag_id=new_flag.id,
         flag_name=new_flag.name,
         operation="create",
-        new_state={
-            "name": new_flag.name,
-            "is_active": new_flag.is_active,
-            "dependencies": [dep.id for dep in new_flag.dependencies]
-        },
+        new_state=flag_state(new_flag, set()),
         reason="Flag created",
         actor=actor
     )
@@ -167,31 +258,38 @@ def create_flag_service(flag_in: FlagBody, db: Session, actor: str = None) -> Fl
     return new_flag
 
 
-def toggle_flag_service(flag_id: int, db: Session, actor: str = None) -> Flag:
+def toggle_flag_service(flag_id: int, environment: str, db: Session, actor: str = None) -> Flag:
     """
-    Toggles a flag's active state with dependency validation.
+    Toggles a flag's active state in an environment with dependency validation.
     """
     flag_db = db.query(Flag).filter(Flag.id == flag_id).first()
     if not flag_db:
         raise HTTPException(status_code=404, detail="Flag not found.")
     
+    existing_environment = find_environment(environment, db)
+    environment_id = existing_environment.id if existing_environment else None
+
+    # Only the flag and its direct dependencies are needed to validate a toggle
+    active_ids = get_active_flag_ids(
+        environment_id, db, flag_ids=[flag_id] + [dep.id for dep in flag_db.dependencies]
+    )
+
     # Capture previous state for audit log
-    previous_state = {
-        "name": flag_db.name,
-        "is_active": flag_db.is_active,
-        "dependencies": [dep.id for dep in flag_db.dependencies]
-    }
+    previous_state = flag_state(flag_db, active_ids)
     
-    if flag_db.is_active == False:
+    if flag_id not in active_ids:
         # Activating: check that all dependencies are active
-        check_dependencies_active(flag_db)
-        flag_db.is_active = True
+        check_dependencies_active(flag_db, active_ids)
+        environment_id = get_or_create_environment(environment, db).id
+        set_flag_active(flag_id, environment_id, True, db)
+        active_ids.add(flag_id)
         operation = "activate"
         reason = "Flag manually activated"
     else:
         # Deactivating: check that no other active flag depends on this one
-        check_no_dependent_flags(flag_id, db)
-        flag_db.is_active = False
+        check_no_dependent_flags(flag_id, environment_id, db)
+        set_flag_active(flag_id, environment_id, False, db)
+        active_ids.discard(flag_id)
         operation = "deactivate"
         reason = "Flag manually deactivated"
 
@@ -199,14 +297,11 @@ def toggle_flag_service(flag_id: int, db: Session, actor: str = None) -> Flag:
     db.refresh(flag_db)
     
     # Log the toggle operation
-    new_state = {
-        "name": flag_db.name,
-        "is_active": flag_db.is_active,
-        "dependencies": [dep.id for dep in flag_db.dependencies]
-    }
+    new_state = flag_state(flag_db, active_ids)
     
     log_audit_event(
         db=db,
+        environment_id=environment_id,
         flag_id=flag_db.id,
         flag_name=flag_db.name,
         operation=operation,
@@ -219,37 +314,30 @@ def toggle_flag_service(flag_id: int, db: Session, actor: str = None) -> Flag:
     return flag_db
 
 
-def auto_disable_flag_service(flag_id: int, db: Session, reason: str = None) -> Flag:
+def auto_disable_flag_service(flag_id: int, environment_id: int, db: Session, reason: str = None) -> Flag:
     """
-    Automatically disables a flag (e.g., when dependencies become inactive).
+    Automatically disables a flag in an environment (e.g., when dependencies become inactive).
     """
     flag_db = db.query(Flag).filter(Flag.id == flag_id).first()
     if not flag_db:
         raise HTTPException(status_code=404, detail="Flag not found.")
     
-    if not flag_db.is_active:
+    if not get_active_flag_ids(environment_id, db, flag_ids=[flag_id]):
         return flag_db  # Already inactive
     
     # Capture previous state for audit log
-    previous_state = {
-        "name": flag_db.name,
-        "is_active": flag_db.is_active,
-        "dependencies": [dep.id for dep in flag_db.dependencies]
-    }
+    previous_state = flag_state(flag_db, {flag_id})
     
-    flag_db.is_active = False
+    set_flag_active(flag_id, environment_id, False, db)
     db.commit()
     db.refresh(flag_db)
     
     # Log the auto-disable operation
-    new_state = {
-        "name": flag_db.name,
-        "is_active": flag_db.is_active,
-        "dependencies": [dep.id for dep in flag_db.dependencies]
-    }
+    new_state = flag_state(flag_db, set())
     
     log_audit_event(
         db=db,
+        environment_id=environment_id,
         flag_id=flag_db.id,
         flag_name=flag_db.name,
         operation="auto-disable",
@@ -262,30 +350,45 @@ def auto_disable_flag_service(flag_id: int, db: Session, reason: str = None) ->
     return flag_db
 
 
-def flag_to_response(flag: Flag) -> FlagResponse:
+def flag_to_response(flag: Flag, active_ids: set[int]) -> FlagResponse:
     """
-    Converts a Flag model to FlagResponse schema.
+    Converts a Flag model to FlagResponse schema using an environment's active IDs.
     """
     return FlagResponse(
         id=flag.id,
         name=flag.name,
-        is_active=flag.is_active,
+        is_active=flag.id in active_ids,
         dependencies=[dep.id for dep in flag.dependencies],
     )
 
 
-def flag_to_nested_response(flag: Flag) -> NestedFlagResponse:
+def flag_to_nested_response(flag: Flag, active_ids: set[int]) -> NestedFlagResponse:
     """
     Converts a Flag model to NestedFlagResponse schema with full dependency details.
     """
     return NestedFlagResponse(
         id=flag.id,
         name=flag.name,
-        is_active=flag.is_active,
-        dependencies=[flag_to_nested_response(dep) for dep in flag.dependencies],
+        is_active=flag.id in active_ids,
+        dependencies=[flag_to_nested_response(dep, active_ids) for dep in flag.dependencies],
     )
 
 
+def get_dependency_ids(flag: Flag) -> list[int]:
+    """
+    Returns the IDs of a flag and all of its transitive dependencies, the flags a nested response shows.
+    """
+    visited = set()
+    stack = [flag]
+    while stack:
+        current = stack.pop()
+        if current.id in visited:
+            continue
+        visited.add(current.id)
+        stack.extend(current.dependencies)
+    return list(visited)
+
+
 def get_flag_by_id_service(flag_id: int, db: Session) -> Flag:
     """
     Gets a flag by ID with all dependencies loaded.
@@ -299,6 +402,7 @@ def get_flag_by_id_service(flag_id: int, db: Session) -> Flag:
 
 def get_audit_logs_service(
     db: Session,
+    environment_id: int | None,
     flag_id: int = None,
     operation: str = None,
     actor: str = None,
@@ -306,9 +410,11 @@ def get_audit_logs_service(
     offset: int = 0
 ) -> list[AuditLog]:
     """
-    Retrieves audit logs with optional filtering.
+    Retrieves the audit logs of an environment with optional filtering.
     """
-    query = db.query(AuditLog)
+    if environment_id is None:
+        return []
+    query = db.query(AuditLog).filter(AuditLog.environment_id == environment_id)
     
     if flag_id:
         query = query.filter(AuditLog.flag_id == flag_id)
@@ -319,4 +425,359 @@ def get_audit_logs_service(
     if actor:
         query = query.filter(AuditLog.actor == actor)
     
-    return query.order_by(AuditLog.timestamp.desc()).offset(offset).limit(limit).all() 
\ No newline at end of file
+    return query.order_by(AuditLog.timestamp.desc()).offset(offset).limit(limit).all()
+
+
+def export_flags_service(environment_id: int | None, db: Session, include_audit_logs: bool = False) -> Iterator[bytes]:
+    """
+    Exports the flag graph of an environment as gzip-compressed NDJSON.
+    Rows are fetched up front so the returned iterator does not depend on the session.
+    """
+    flags = db.execute(select(Flag.id, Flag.name).order_by(Flag.id)).all()
+    active_ids = get_active_flag_ids(environment_id, db)
+    edges = db.execute(select(
+        flag_dependencies_association.c.flag_id,
+        flag_dependencies_association.c.dependent_flag_id
+    )).all()
+    audit_logs = []
+    if include_audit_logs and environment_id is not None:
+        audit_logs = db.execute(
+            select(*(getattr(AuditLog, column) for column in AUDIT_LOG_COLUMNS))
+            .filter(AuditLog.environment_id == environment_id)
+            .order_by(AuditLog.id)
+        ).all()
+
+    def records() -> Iterator[dict]:
+        for flag_id, name in flags:
+            yield {"type": "flag", "id": flag_id, "name": name, "is_active": flag_id in active_ids}
+        for flag_id, dependent_flag_id in edges:
+            yield {"type": "dependency", "flag_id": flag_id, "dependent_flag_id": dependent_flag_id}
+        for row in audit_logs:
+            record = dict(zip(AUDIT_LOG_COLUMNS, row))
+            record["timestamp"] = record["timestamp"].isoformat()
+            yield {"type": "audit_log", **record}
+
+    return encode_ndjson_gz(records())
+
+
+def encode_ndjson_gz(records: Iterator[dict]) -> Iterator[bytes]:
+    """
+    Encodes records as NDJSON, yielding gzip-compressed chunks.
+    """
+    # wbits=31 produces a gzip container that can be emitted chunk by chunk
+    compressor = zlib.compressobj(wbits=31)
+    chunk = []
+    for record in records:
+        chunk.append(json.dumps(record, separators=(",", ":")))
+        if len(chunk) == IMPORT_BATCH_SIZE:
+            yield compressor.compress(("\n".join(chunk) + "\n").encode())
+            chunk = []
+    if chunk:
+        yield compressor.compress(("\n".join(chunk) + "\n").encode())
+    yield compressor.flush()
+
+
+def import_field(record: dict, key: str, expected: type, required: bool = True):
+    """
+    Returns record[key] if it has the expected JSON type, raising ValueError otherwise.
+    Missing or null optional fields are returned as None.
+    """
+    value = record.get(key)
+    if value is None and not required:
+        return None
+    # bool is a subclass of int, but true/false is never a valid ID
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ValueError(f"Invalid {key}.")
+    return value
+
+
+def import_timestamp(value: str) -> datetime:
+    """
+    Parses an ISO 8601 timestamp as the naive UTC datetime stored in audit logs.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class ImportGraph:
+    """
+    Flags, dependency edges and audit rows of an import, checked record by record as they are parsed.
+    """
+
+    def __init__(self):
+        self.flags: dict[int, tuple[str, bool]] = {}
+        self.names: set[str] = set()
+        self.edges: list[tuple[int, int]] = []
+        self.edge_set: set[tuple[int, int]] = set()
+        self.audit_logs: list[tuple] = []
+
+    def add_line(self, line_number: int, line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Record is not an object.")
+            record_type = record.get("type")
+            if record_type == "flag":
+                flag_id = import_field(record, "id", int)
+                name = import_field(record, "name", str)
+                if flag_id in self.flags:
+                    raise HTTPException(status_code=400, detail=f"Duplicate flag id {flag_id} on line {line_number}.")
+                if name in self.names:
+                    raise HTTPException(status_code=400, detail=f"Duplicate flag name '{name}' on line {line_number}.")
+                self.flags[flag_id] = (name, import_field(record, "is_active", bool, required=False) is True)
+                self.names.add(name)
+            elif record_type == "dependency":
+                edge = (import_field(record, "flag_id", int), import_field(record, "dependent_flag_id", int))
+                if edge in self.edge_set:
+                    raise HTTPException(status_code=400, detail=f"Duplicate dependency on line {line_number}.")
+                self.edges.append(edge)
+                self.edge_set.add(edge)
+            elif record_type == "audit_log":
+                self.audit_logs.append((
+                    import_field(record, "flag_id", int),
+                    import_field(record, "flag_name", str),
+                    import_field(record, "operation", str),
+                    import_field(record, "previous_state", str, required=False),
+                    import_field(record, "new_state", str, required=False),
+                    import_field(record, "reason", str, required=False),
+                    import_field(record, "actor", str, required=False),
+                    import_timestamp(import_field(record, "timestamp", str)),
+                ))
+            else:
+                raise ValueError("Unknown record type.")
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid import record on line {line_number}.")
+
+
+async def read_import_graph(chunks: AsyncIterator[bytes], max_bytes: int = None) -> ImportGraph:
+    """
+    Parses an NDJSON upload as it streams in, gunzipping it incrementally if it starts with the gzip magic bytes.
+    Raises HTTPException once the decompressed size exceeds max_bytes.
+    """
+    max_bytes = max_bytes or MAX_IMPORT_BYTES
+    graph = ImportGraph()
+    decompressor = None
+    head = b""
+    pending = b""
+    size = 0
+    line_number = 0
+    async for chunk in chunks:
+        if decompressor is None:
+            # Wait for enough bytes to tell gzip from plain NDJSON
+            head += chunk
+            if len(head) < len(GZIP_MAGIC):
+                continue
+            chunk, head = head, b""
+            decompressor = zlib.decompressobj(wbits=31) if chunk.startswith(GZIP_MAGIC) else False
+        if decompressor:
+            data = b""
+            try:
+                while chunk and size + len(data) <= max_bytes:
+                    if decompressor.eof:
+                        # Concatenated gzip members are a valid gzip file, e.g. from appending to an export
+                        decompressor = zlib.decompressobj(wbits=31)
+                    # Never inflate more than one byte past the limit, however well the input compresses
+                    data += decompressor.decompress(chunk, max_bytes - size - len(data) + 1)
+                    chunk = decompressor.unused_data if decompressor.eof else b""
+            except zlib.error:
+                raise HTTPException(status_code=400, detail="Import payload is not valid gzip.")
+        else:
+            data = chunk
+        size += len(data)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Import payload exceeds {max_bytes} bytes.")
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            graph.add_line(line_number, line)
+    if decompressor and not decompressor.eof:
+        raise HTTPException(status_code=400, detail="Import payload is not valid gzip.")
+    graph.add_line(line_number + 1, pending + head)
+    return graph
+
+
+def dependency_order(flag_ids: set[int], edges: list[tuple[int, int]]) -> list[int] | None:
+    """
+    Returns the flag IDs ordered so that every flag follows its dependencies,
+    or None if the dependency edges contain a cycle. The whole graph is checked in one pass.
+    """
+    in_degree = dict.fromkeys(flag_ids, 0)
+    dependents = {flag_id: [] for flag_id in flag_ids}
+    for flag_id, dependent_flag_id in edges:
+        in_degree[flag_id] += 1
+        dependents[dependent_flag_id].append(flag_id)
+
+    # Kahn's algorithm: every flag is visited once its dependencies have been
+    ready = [flag_id for flag_id, degree in in_degree.items() if degree == 0]
+    order = []
+    while ready:
+        current_id = ready.pop()
+        order.append(current_id)
+        for flag_id in dependents[current_id]:
+            in_degree[flag_id] -= 1
+            if in_degree[flag_id] == 0:
+                ready.append(flag_id)
+    return order if len(order) == len(flag_ids) else None
+
+
+def has_redundant_dependency(order: list[int], dependencies: dict[int, list[int]], checked_ids: set[int]) -> bool:
+    """
+    Returns True if any flag in checked_ids directly depends on a flag it already reaches through another dependency.
+    Applies the redundancy rule of has_circular_dependency to a whole acyclic graph held in memory, given its dependency_order.
+    """
+    dependent_counts = dict.fromkeys(order, 0)
+    for direct_deps in dependencies.values():
+        for dep_id in direct_deps:
+            dependent_counts[dep_id] += 1
+    # Only flags something depends on can be an ancestor, so only they get a bit
+    bits = {flag_id: 1 << index for index, flag_id in enumerate(
+        flag_id for flag_id in order if dependent_counts[flag_id]
+    )}
+
+    # Each flag's ancestors are computed once from its dependencies' and kept as a bitmask
+    # until its last dependent has used them
+    ancestors = {}
+    for flag_id in order:
+        direct = 0
+        reachable = 0
+        for dep_id in dependencies[flag_id]:
+            direct |= bits[dep_id]
+            reachable |= ancestors[dep_id]
+            dependent_counts[dep_id] -= 1
+            if not dependent_counts[dep_id]:
+                del ancestors[dep_id]
+        if reachable & direct and flag_id in checked_ids:
+            return True
+        if dependent_counts[flag_id]:
+            ancestors[flag_id] = reachable | direct
+    return False
+
+
+def bulk_insert(db: Session, table: Table, columns: tuple[str, ...], rows: list[tuple]) -> None:
+    """
+    Inserts rows using Postgres COPY, falling back to batched multi-row inserts on other databases.
+    """
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        buffer = io.StringIO()
+        # QUOTE_NOTNULL leaves only None unquoted, which COPY reads as NULL
+        csv.writer(buffer, quoting=csv.QUOTE_NOTNULL).writerows(rows)
+        buffer.seek(0)
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        return
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        batch = rows[start:start + IMPORT_BATCH_SIZE]
+        db.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+
+
+def import_flags_service(graph: ImportGraph, environment: str, db: Session, actor: str = None) -> ImportSummary:
+    """
+    Imports a flag graph produced by export_flags_service and parsed by read_import_graph into an environment.
+    Flag IDs are kept as exported, and flags whose definition already exists are reused.
+    The whole graph is validated in memory before anything is written.
+    """
+    flags = graph.flags
+    edges = graph.edges
+    audit_logs = graph.audit_logs
+
+    dependencies = {flag_id: [] for flag_id in flags}
+    for flag_id, dependent_flag_id in edges:
+        if flag_id not in flags or dependent_flag_id not in flags:
+            raise HTTPException(status_code=400, detail="One or more dependencies not found.")
+        dependencies[flag_id].append(dependent_flag_id)
+    if any(flag_id not in flags for flag_id, *_ in audit_logs):
+        raise HTTPException(status_code=400, detail="Flag not found.")
+    order = dependency_order(set(flags), edges)
+    if order is None:
+        raise HTTPException(status_code=400, detail="Circular dependency detected.")
+
+    active_ids = {flag_id for flag_id, (_, is_active) in flags.items() if is_active}
+    if any(dep_id not in active_ids for flag_id in active_ids for dep_id in dependencies[flag_id]):
+        raise HTTPException(status_code=400, detail="All dependencies must be active to activate this flag.")
+
+    # Definitions are shared by all environments: flags that already exist with the same
+    # name and dependencies are reused, so only their state is written to this environment
+    existing_names = dict(db.execute(select(Flag.id, Flag.name)).all())
+    existing_ids = {name: flag_id for flag_id, name in existing_names.items()}
+    existing_edges = db.execute(select(
+        flag_dependencies_association.c.flag_id,
+        flag_dependencies_association.c.dependent_flag_id
+    )).all()
+    existing_dependencies = {}
+    for flag_id, dependent_flag_id in existing_edges:
+        existing_dependencies.setdefault(flag_id, set()).add(dependent_flag_id)
+
+    new_ids = []
+    for flag_id, (name, _) in flags.items():
+        if flag_id not in existing_names:
+            if name in existing_ids:
+                raise HTTPException(status_code=400, detail="Flag with this name already exists.")
+            new_ids.append(flag_id)
+        elif existing_names[flag_id] != name:
+            raise HTTPException(status_code=400, detail=f"Flag with id {flag_id} already exists with a different name.")
+        elif existing_dependencies.get(flag_id, set()) != set(dependencies[flag_id]):
+            raise HTTPException(status_code=400, detail=f"Flag '{name}' already exists with different dependencies.")
+
+    # Reused definitions were validated when they were created through the API
+    if has_redundant_dependency(order, dependencies, set(new_ids)):
+        raise HTTPException(status_code=400, detail="Circular dependency detected.")
+
+    # Flags outside the import keep their state, so none of them may depend on a flag it deactivates
+    existing_environment = find_environment(environment, db)
+    environment_active_ids = get_active_flag_ids(existing_environment.id if existing_environment else None, db)
+    for flag_id, dependent_flag_id in existing_edges:
+        if (flag_id not in flags and flag_id in environment_active_ids
+                and dependent_flag_id in flags and dependent_flag_id not in active_ids):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot deactivate: flag '{existing_names[flag_id]}' depends on this flag."
+            )
+
+    # Record the import itself after any imported history
+    now = datetime.utcnow()
+    for flag_id, (name, is_active) in flags.items():
+        new_state = {"name": name, "is_active": is_active, "dependencies": dependencies[flag_id]}
+        audit_logs.append((flag_id, name, "import", None, json.dumps(new_state), "Flag imported", actor, now))
+
+    environment_id = get_or_create_environment(environment, db).id
+    new_flags = set(new_ids)
+    bulk_insert(db, Flag.__table__, ("id", "name"), [(flag_id, flags[flag_id][0]) for flag_id in new_ids])
+    bulk_insert(
+        db, flag_dependencies_association, ("flag_id", "dependent_flag_id"),
+        [edge for edge in edges if edge[0] in new_flags]
+    )
+    # Replace whatever state the reused flags had in this environment
+    reused_ids = [flag_id for flag_id in flags if flag_id not in new_flags]
+    for start in range(0, len(reused_ids), IMPORT_BATCH_SIZE):
+        db.execute(delete(FlagState).where(
+            FlagState.environment_id == environment_id,
+            FlagState.flag_id.in_(reused_ids[start:start + IMPORT_BATCH_SIZE])
+        ))
+    bulk_insert(
+        db, FlagState.__table__, ("environment_id", "flag_id", "is_active"),
+        [(environment_id, flag_id, True) for flag_id in active_ids]
+    )
+    bulk_insert(
+        db, AuditLog.__table__, ("environment_id",) + AUDIT_LOG_COLUMNS,
+        [(environment_id,) + row for row in audit_logs]
+    )
+    if new_ids and db.get_bind().dialect.name == "postgresql":
+        # Explicit IDs bypass the sequence, so move it past the imported flags
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('flags', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM flags"
+        ))
+    db.commit()
+
+    return ImportSummary(
+        flags=len(flags),
+        created_flags=len(new_ids),
+        dependencies=len(edges),
+        audit_logs=len(audit_logs) - len(flags)
+    )
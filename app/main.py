@@ -1,19 +1,20 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from app.dependencies import validate_environment_name
+from app.routers.environments import router as environments_router
 from app.routers.flags import router as flags_router
-from app.internal.database import engine
-from app.internal.models import Base
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Create all tables on startup
-    Base.metadata.create_all(bind=engine)
-    yield
-
-
-app = FastAPI(lifespan=lifespan)
+# The schema is managed by migrations (alembic upgrade head), not at worker startup
+app = FastAPI()
 
+app.include_router(environments_router, prefix="/environments", tags=["Environments"])
+# Flags are scoped per environment; the unprefixed routes serve the default environment
+app.include_router(
+    flags_router,
+    prefix="/environments/{environment}/flags",
+    tags=["Flags"],
+    dependencies=[Depends(validate_environment_name)]
+)
 app.include_router(flags_router, prefix="/flags", tags=["Flags"])
 
 
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.dependencies import get_db
+from app.internal.models import Environment
+from app.internal.schemas import EnvironmentResponse
+
+router = APIRouter()
+
+@router.get("/", response_model=list[EnvironmentResponse])
+def read_environments(db: Session = Depends(get_db)):
+    """
+    List environments. Environments are created by the first write to them through the flag endpoints.
+    """
+    return db.query(Environment).order_by(Environment.name).all()
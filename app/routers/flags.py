@@ -1,55 +1,113 @@
 from fastapi import APIRouter, Depends, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional
-from app.dependencies import get_db
+from app.dependencies import get_db, get_environment_id, get_environment_name, get_import_graph
 from app.internal.models import Flag, AuditLog
-from app.internal.schemas import FlagBody, FlagResponse, NestedFlagResponse, AuditLogResponse
+from app.internal.schemas import FlagBody, FlagResponse, NestedFlagResponse, AuditLogResponse, ImportSummary
 from app.internal.service import (
     create_flag_service, 
     toggle_flag_service, 
     flag_to_response, 
     get_flag_by_id_service, 
+    get_dependency_ids,
     flag_to_nested_response,
-    get_audit_logs_service
+    get_active_flag_ids,
+    get_audit_logs_service,
+    find_environment,
+    export_flags_service,
+    import_flags_service,
+    ImportGraph
 )
 
 router = APIRouter()
 
 @router.get("/", response_model=list[FlagResponse])
-def read_flags(db: Session = Depends(get_db)):
+def read_flags(db: Session = Depends(get_db), environment_id: Optional[int] = Depends(get_environment_id)):
     flags = db.query(Flag).options(joinedload(Flag.dependencies)).all()
-    return [flag_to_response(flag) for flag in flags]
+    active_ids = get_active_flag_ids(environment_id, db)
+    return [flag_to_response(flag, active_ids) for flag in flags]
+
+
+# Declared before /{flag_id} so "export" is not parsed as a flag ID
+@router.get("/export", response_class=StreamingResponse)
+def export_flags(
+    db: Session = Depends(get_db),
+    environment_id: Optional[int] = Depends(get_environment_id),
+    include_audit_logs: bool = Query(False, description="Include the environment's audit history")
+):
+    """
+    Export all flags, their dependencies and active states as gzip-compressed NDJSON.
+    """
+    content = export_flags_service(environment_id, db, include_audit_logs=include_audit_logs)
+    # The gzip file is the payload itself, not a transport encoding clients would undo
+    return StreamingResponse(
+        content,
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="flags.ndjson.gz"'}
+    )
+
+
+@router.post(
+    "/import",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ImportSummary,
+    # The body is read from the request stream, so it is described here instead of by a parameter
+    openapi_extra={"requestBody": {
+        "required": True,
+        "description": "NDJSON produced by the export endpoint, optionally gzip-compressed",
+        "content": {
+            "application/gzip": {"schema": {"type": "string", "format": "binary"}},
+            "application/x-ndjson": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }}
+)
+def import_flags(
+    graph: ImportGraph = Depends(get_import_graph),
+    db: Session = Depends(get_db),
+    environment: str = Depends(get_environment_name),
+    actor: Optional[str] = Query(None, description="Actor performing the operation")
+):
+    """
+    Import a flag graph produced by the export endpoint, keeping flag IDs stable.
+    """
+    return import_flags_service(graph, environment, db, actor=actor)
 
 
 @router.get("/{flag_id}", response_model=NestedFlagResponse)
-def get_flag_by_id(flag_id: int, db: Session = Depends(get_db)):
+def get_flag_by_id(flag_id: int, db: Session = Depends(get_db), environment_id: Optional[int] = Depends(get_environment_id)):
     flag = get_flag_by_id_service(flag_id, db)
-    return flag_to_nested_response(flag)
+    active_ids = get_active_flag_ids(environment_id, db, flag_ids=get_dependency_ids(flag))
+    return flag_to_nested_response(flag, active_ids)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=FlagResponse)
 def create_flag(
     flag_in: FlagBody, 
     db: Session = Depends(get_db),
+    environment: str = Depends(get_environment_name),
     actor: Optional[str] = Query(None, description="Actor performing the operation")
 ):
-    new_flag = create_flag_service(flag_in, db, actor=actor)
-    return flag_to_response(new_flag)
+    new_flag = create_flag_service(flag_in, environment, db, actor=actor)
+    return flag_to_response(new_flag, set())
 
 @router.patch("/toggle/{flag_id}", response_model=FlagResponse)
 def toggle_flag(
     flag_id: int, 
     db: Session = Depends(get_db),
+    environment: str = Depends(get_environment_name),
     actor: Optional[str] = Query(None, description="Actor performing the operation")
 ):
-    flag_db = toggle_flag_service(flag_id, db, actor=actor)
-    return flag_to_response(flag_db)
+    flag_db = toggle_flag_service(flag_id, environment, db, actor=actor)
+    environment_id = find_environment(environment, db).id
+    return flag_to_response(flag_db, get_active_flag_ids(environment_id, db, flag_ids=[flag_db.id]))
 
 
 # Audit logs endpoints
 @router.get("/audit-logs/", response_model=list[AuditLogResponse])
 def get_audit_logs(
     db: Session = Depends(get_db),
+    environment_id: Optional[int] = Depends(get_environment_id),
     flag_id: Optional[int] = Query(None, description="Filter by flag ID"),
     operation: Optional[str] = Query(None, description="Filter by operation type"),
     actor: Optional[str] = Query(None, description="Filter by actor"),
@@ -61,6 +119,7 @@ def get_audit_logs(
     """
     audit_logs = get_audit_logs_service(
         db=db,
+        environment_id=environment_id,
         flag_id=flag_id,
         operation=operation,
         actor=actor,
@@ -0,0 +1,69 @@
+"""baseline schema
+
+The schema Base.metadata.create_all built before migrations were introduced.
+Existing databases created that way are marked as this revision with
+`alembic stamp 0001` and then upgraded normally.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 05:21:34.108048
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('flags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_flags_id'), 'flags', ['id'], unique=False)
+    op.create_index(op.f('ix_flags_name'), 'flags', ['name'], unique=True)
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('flag_id', sa.Integer(), nullable=False),
+    sa.Column('flag_name', sa.String(), nullable=False),
+    sa.Column('operation', sa.String(), nullable=False),
+    sa.Column('previous_state', sa.String(), nullable=True),
+    sa.Column('new_state', sa.String(), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('actor', sa.String(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['flag_id'], ['flags.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_logs_flag_id'), 'audit_logs', ['flag_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_timestamp'), 'audit_logs', ['timestamp'], unique=False)
+    op.create_table('flag_dependencies',
+    sa.Column('flag_id', sa.Integer(), nullable=False),
+    sa.Column('dependent_flag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['dependent_flag_id'], ['flags.id'], ),
+    sa.ForeignKeyConstraint(['flag_id'], ['flags.id'], ),
+    sa.PrimaryKeyConstraint('flag_id', 'dependent_flag_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('flag_dependencies')
+    op.drop_index(op.f('ix_audit_logs_timestamp'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_flag_id'), table_name='audit_logs')
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_flags_name'), table_name='flags')
+    op.drop_index(op.f('ix_flags_id'), table_name='flags')
+    op.drop_table('flags')
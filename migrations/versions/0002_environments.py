@@ -0,0 +1,83 @@
+"""environments
+
+Moves the active state of flags into per-environment flag_states and scopes
+audit logs by environment. Existing active states and audit logs are kept in
+the `default` environment.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 05:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('environments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_environments_id'), 'environments', ['id'], unique=False)
+    op.create_index(op.f('ix_environments_name'), 'environments', ['name'], unique=True)
+    op.create_table('flag_states',
+    sa.Column('environment_id', sa.Integer(), nullable=False),
+    sa.Column('flag_id', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['environment_id'], ['environments.id'], ),
+    sa.ForeignKeyConstraint(['flag_id'], ['flags.id'], ),
+    sa.PrimaryKeyConstraint('environment_id', 'flag_id')
+    )
+    op.create_index(op.f('ix_flag_states_flag_id'), 'flag_states', ['flag_id'], unique=False)
+
+    # Everything that existed so far belongs to the default environment
+    op.execute("INSERT INTO environments (name) VALUES ('default')")
+    op.execute(
+        "INSERT INTO flag_states (environment_id, flag_id, is_active) "
+        "SELECT environments.id, flags.id, true FROM flags, environments "
+        "WHERE environments.name = 'default' AND flags.is_active"
+    )
+
+    op.add_column('audit_logs', sa.Column('environment_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE audit_logs SET environment_id = (SELECT id FROM environments WHERE name = 'default')")
+    op.alter_column('audit_logs', 'environment_id', nullable=False)
+    op.create_index(op.f('ix_audit_logs_environment_id'), 'audit_logs', ['environment_id'], unique=False)
+    op.create_foreign_key('audit_logs_environment_id_fkey', 'audit_logs', 'environments', ['environment_id'], ['id'])
+
+    op.drop_column('flags', 'is_active')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Only the default environment fits the single-environment schema
+    op.add_column('flags', sa.Column('is_active', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.alter_column('flags', 'is_active', server_default=None)
+    op.execute(
+        "UPDATE flags SET is_active = true FROM flag_states, environments "
+        "WHERE flag_states.flag_id = flags.id AND flag_states.environment_id = environments.id "
+        "AND environments.name = 'default' AND flag_states.is_active"
+    )
+    op.execute(
+        "DELETE FROM audit_logs WHERE environment_id <> "
+        "(SELECT id FROM environments WHERE name = 'default')"
+    )
+
+    op.drop_constraint('audit_logs_environment_id_fkey', 'audit_logs', type_='foreignkey')
+    op.drop_index(op.f('ix_audit_logs_environment_id'), table_name='audit_logs')
+    op.drop_column('audit_logs', 'environment_id')
+    op.drop_index(op.f('ix_flag_states_flag_id'), table_name='flag_states')
+    op.drop_table('flag_states')
+    op.drop_index(op.f('ix_environments_name'), table_name='environments')
+    op.drop_index(op.f('ix_environments_id'), table_name='environments')
+    op.drop_table('environments')
@@ -1,36 +1,67 @@
 import pytest
+from alembic import command
+from alembic.config import Config
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
 from app.main import app
 from app.dependencies import get_db
-from app.internal.models import Base
 import os
 
 # Use Postgres test DB URL from env
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Each pytest-xdist worker (gw0, gw1, ...) gets its own schema so workers can run in parallel
+SCHEMA = f"test_{os.getenv('PYTEST_XDIST_WORKER', 'main')}"
 
-# Override get_db dependency
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
 
-app.dependency_overrides[get_db] = override_get_db
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+
+@pytest.fixture(scope="session", autouse=True)
+def test_schema():
+    # Build the worker's schema once by applying the migrations
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        config = Config(ALEMBIC_CONFIG)
+        config.attributes["connection"] = connection
+        config.attributes["configure_logger"] = False
+        command.upgrade(config, "head")
+    yield
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
 
 @pytest.fixture(scope="function")
-def db_session():
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+def connection():
+    # Run each test in a transaction that is rolled back afterwards;
+    # commits made by the app only release savepoints inside it
+    connection = engine.connect()
+    transaction = connection.begin()
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+def session_for(connection):
+    return Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+
+@pytest.fixture(scope="function")
+def db_session(connection):
+    db = session_for(connection)
     yield db
     db.close()
-    Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="function")
-def client(db_session):
-    return TestClient(app)
+def client(connection, db_session):
+    # Give every request its own session, as get_db does, so state does not leak between them
+    def override_get_db():
+        db = session_for(connection)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
\ No newline at end of file
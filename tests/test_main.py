@@ -1,4 +1,8 @@
+import asyncio
+import gzip
+import json
 from sqlalchemy import text
+from app.internal import service
 
 # 1. Creates a flag without dependencies.
 def test_create_flag_without_dependencies(client):
@@ -123,4 +127,287 @@ def test_retrieve_audit_history(client):
     data = response.json()
     assert isinstance(data, list)
     assert any(entry["operation"] == "create" for entry in data)
-    assert any(entry["operation"] == "activate" for entry in data) 
\ No newline at end of file
+    assert any(entry["operation"] == "activate" for entry in data) 
+
+# 11. Toggling a flag in one environment leaves other environments untouched.
+def test_toggle_flag_is_scoped_to_environment(client):
+    flag_response = client.post("/environments/staging/flags/", json={"name": "flag10", "dependencies": []})
+    flag_id = flag_response.json()["id"]
+    
+    # Enable the flag in staging only
+    response = client.patch(f"/environments/staging/flags/toggle/{flag_id}")
+    assert response.status_code == 200
+    assert response.json()["is_active"] is True
+    
+    # The definition is shared, the active state is not
+    response = client.get(f"/environments/production/flags/{flag_id}")
+    assert response.status_code == 200
+    assert response.json()["is_active"] is False
+    
+    response = client.get("/flags/")
+    assert [flag["is_active"] for flag in response.json() if flag["id"] == flag_id] == [False]
+
+# 12. Dependency checks use the active state of the same environment.
+def test_enable_flag_with_dependency_active_in_other_environment(client):
+    dep_response = client.post("/flags/", json={"name": "dep3", "dependencies": []})
+    dep_id = dep_response.json()["id"]
+    flag_response = client.post("/flags/", json={"name": "flag11", "dependencies": [dep_id]})
+    flag_id = flag_response.json()["id"]
+    
+    # Activate the dependency in staging only
+    client.patch(f"/environments/staging/flags/toggle/{dep_id}")
+    
+    response = client.patch(f"/environments/production/flags/toggle/{flag_id}")
+    assert response.status_code == 400
+    assert "All dependencies must be active" in response.text
+    
+    response = client.patch(f"/environments/staging/flags/toggle/{flag_id}")
+    assert response.status_code == 200
+    assert response.json()["is_active"] is True
+
+# 13. Audit history is recorded and retrieved per environment.
+def test_audit_history_is_scoped_to_environment(client):
+    flag_response = client.post("/environments/staging/flags/", json={"name": "flag12", "dependencies": []})
+    flag_id = flag_response.json()["id"]
+    
+    client.patch(f"/environments/production/flags/toggle/{flag_id}")
+    
+    staging = client.get("/environments/staging/flags/audit-logs/", params={"flag_id": flag_id}).json()
+    production = client.get("/environments/production/flags/audit-logs/", params={"flag_id": flag_id}).json()
+    assert [entry["operation"] for entry in staging] == ["create"]
+    assert [entry["operation"] for entry in production] == ["activate"]
+    
+    response = client.get("/environments/")
+    assert {"staging", "production"} <= {env["name"] for env in response.json()}
+
+# 14. Reading an environment that was never written to does not create it.
+def test_read_unknown_environment(client):
+    flag_response = client.post("/flags/", json={"name": "flag15", "dependencies": []})
+    flag_id = flag_response.json()["id"]
+    client.patch(f"/flags/toggle/{flag_id}")
+    
+    response = client.get("/environments/stagign/flags/")
+    assert response.status_code == 200
+    assert [flag["is_active"] for flag in response.json() if flag["id"] == flag_id] == [False]
+    assert client.get("/environments/stagign/flags/audit-logs/").json() == []
+    assert "stagign" not in {env["name"] for env in client.get("/environments/").json()}
+
+
+def to_ndjson_gz(records):
+    return gzip.compress("".join(json.dumps(record) + "\n" for record in records).encode())
+
+def from_ndjson_gz(content):
+    return [json.loads(line) for line in gzip.decompress(content).splitlines()]
+
+# 15. Exports flags, dependencies and the environment's active states.
+def test_export_flags(client):
+    dep_response = client.post("/flags/", json={"name": "dep4", "dependencies": []})
+    dep_id = dep_response.json()["id"]
+    flag_response = client.post("/flags/", json={"name": "flag13", "dependencies": [dep_id]})
+    flag_id = flag_response.json()["id"]
+    client.patch(f"/environments/staging/flags/toggle/{dep_id}")
+    
+    response = client.get("/environments/staging/flags/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+    records = from_ndjson_gz(response.content)
+    assert {"type": "flag", "id": dep_id, "name": "dep4", "is_active": True} in records
+    assert {"type": "flag", "id": flag_id, "name": "flag13", "is_active": False} in records
+    assert {"type": "dependency", "flag_id": flag_id, "dependent_flag_id": dep_id} in records
+    assert not any(record["type"] == "audit_log" for record in records)
+    
+    response = client.get("/environments/staging/flags/export", params={"include_audit_logs": True})
+    records = from_ndjson_gz(response.content)
+    assert [record["operation"] for record in records if record["type"] == "audit_log"] == ["activate"]
+
+# 16. Imports a gzip-compressed graph keeping flag IDs stable.
+def test_import_flags(client):
+    payload = to_ndjson_gz([
+        {"type": "flag", "id": 40, "name": "imported1", "is_active": True},
+        {"type": "flag", "id": 41, "name": "imported2", "is_active": False},
+        {"type": "dependency", "flag_id": 41, "dependent_flag_id": 40},
+    ])
+    response = client.post("/environments/staging/flags/import", content=payload)
+    assert response.status_code == 201
+    assert response.json() == {"flags": 2, "created_flags": 2, "dependencies": 1, "audit_logs": 0}
+    
+    response = client.get("/environments/staging/flags/41")
+    assert response.json()["dependencies"][0]["id"] == 40
+    assert response.json()["dependencies"][0]["is_active"] is True
+    
+    # New flags are numbered after the imported ones
+    response = client.post("/flags/", json={"name": "flag14", "dependencies": [41]})
+    assert response.status_code == 201
+    assert response.json()["id"] > 41
+
+# 17. Rejects an import whose dependency graph the API would reject as circular.
+def test_import_flags_with_circular_dependency(client):
+    payload = to_ndjson_gz([
+        {"type": "flag", "id": 1, "name": "cycle1"},
+        {"type": "flag", "id": 2, "name": "cycle2"},
+        {"type": "dependency", "flag_id": 1, "dependent_flag_id": 2},
+        {"type": "dependency", "flag_id": 2, "dependent_flag_id": 1},
+    ])
+    response = client.post("/flags/import", content=payload)
+    assert response.status_code == 400
+    assert "circular" in response.text.lower()
+    
+    # A redundant edge is rejected as in test 3
+    payload = to_ndjson_gz([
+        {"type": "flag", "id": 1, "name": "flagA"},
+        {"type": "flag", "id": 2, "name": "flagB"},
+        {"type": "flag", "id": 3, "name": "flagC"},
+        {"type": "dependency", "flag_id": 2, "dependent_flag_id": 1},
+        {"type": "dependency", "flag_id": 3, "dependent_flag_id": 2},
+        {"type": "dependency", "flag_id": 3, "dependent_flag_id": 1},
+    ])
+    response = client.post("/flags/import", content=payload)
+    assert response.status_code == 400
+    assert "circular" in response.text.lower()
+
+    # Also when the redundant dependency is reached through a longer chain
+    payload = to_ndjson_gz(
+        [{"type": "flag", "id": flag_id, "name": f"chain{flag_id}"} for flag_id in range(1, 6)]
+        + [{"type": "dependency", "flag_id": flag_id + 1, "dependent_flag_id": flag_id} for flag_id in range(1, 5)]
+        + [{"type": "dependency", "flag_id": 5, "dependent_flag_id": 1}]
+    )
+    response = client.post("/flags/import", content=payload)
+    assert response.status_code == 400
+    assert "circular" in response.text.lower()
+    assert client.get("/flags/").json() == []
+
+# 18. Rejects imports with duplicate or mistyped records instead of failing on insert.
+def test_import_flags_with_invalid_records(client):
+    flag = {"type": "flag", "id": 50, "name": "invalid1"}
+    invalid_payloads = [
+        [flag, {"type": "flag", "id": 50, "name": "invalid2"}],
+        [flag, {"type": "flag", "id": 51, "name": "invalid1"}],
+        [flag, {"type": "flag", "id": 51, "name": "invalid2"},
+         {"type": "dependency", "flag_id": 51, "dependent_flag_id": 50},
+         {"type": "dependency", "flag_id": 51, "dependent_flag_id": 50}],
+        [flag, {"type": "audit_log", "flag_id": 50, "flag_name": "invalid1", "operation": "create",
+                "previous_state": {"is_active": False}, "timestamp": "2025-01-01T00:00:00"}],
+        [{"type": "flag", "id": "50", "name": "invalid1"}],
+    ]
+    for records in invalid_payloads:
+        response = client.post("/flags/import", content=to_ndjson_gz(records))
+        assert response.status_code == 400, records
+    assert client.get("/flags/").json() == []
+
+# 19. Imports another environment's export, reusing the shared flag definitions.
+def test_import_flags_into_another_environment(client):
+    dep_response = client.post("/flags/", json={"name": "dep5", "dependencies": []})
+    dep_id = dep_response.json()["id"]
+    flag_response = client.post("/flags/", json={"name": "flag16", "dependencies": [dep_id]})
+    flag_id = flag_response.json()["id"]
+    client.patch(f"/environments/a/flags/toggle/{dep_id}")
+    client.patch(f"/environments/a/flags/toggle/{flag_id}")
+    
+    export = client.get("/environments/a/flags/export").content
+    response = client.post("/environments/b/flags/import", content=export)
+    assert response.status_code == 201
+    assert response.json()["created_flags"] == 0
+    assert client.get(f"/environments/b/flags/{flag_id}").json()["is_active"] is True
+    
+    # An existing id with a different definition is a conflict
+    payload = to_ndjson_gz([{"type": "flag", "id": dep_id, "name": "renamed"}])
+    response = client.post("/environments/b/flags/import", content=payload)
+    assert response.status_code == 400
+    assert f"Flag with id {dep_id} already exists with a different name." in response.text
+
+# 20. Rejects an import that decompresses past the size limit.
+def test_import_flags_too_large(client, monkeypatch):
+    monkeypatch.setattr(service, "MAX_IMPORT_BYTES", 1024)
+    payload = gzip.compress(b" " * 1024 * 1024)
+    response = client.post("/flags/import", content=payload)
+    assert response.status_code == 413
+
+# 21. Parses uploads regardless of how they are split into chunks.
+def test_read_import_graph_in_chunks():
+    records = [
+        {"type": "flag", "id": 60, "name": "chunked1", "is_active": True},
+        {"type": "flag", "id": 61, "name": "chunked2"},
+        {"type": "dependency", "flag_id": 61, "dependent_flag_id": 60},
+    ]
+    plain = "".join(json.dumps(record) + "\n" for record in records).encode()
+    
+    async def chunks(payload):
+        for start in range(0, len(payload), 7):
+            yield payload[start:start + 7]
+    
+    multi_member = gzip.compress(plain[:50]) + gzip.compress(plain[50:])
+    for payload in (plain, gzip.compress(plain), multi_member, plain.rstrip()):
+        graph = asyncio.run(service.read_import_graph(chunks(payload)))
+        assert graph.flags == {60: ("chunked1", True), 61: ("chunked2", False)}
+        assert graph.edges == [(61, 60)]
+
+# 22. Imports every member of a multi-member gzip file.
+def test_import_flags_multi_member_gzip(client):
+    payload = (
+        to_ndjson_gz([{"type": "flag", "id": 500, "name": "member1"}])
+        + to_ndjson_gz([{"type": "flag", "id": 501, "name": "member2"}])
+    )
+    response = client.post("/flags/import", content=payload)
+    assert response.status_code == 201
+    assert response.json()["flags"] == 2
+    assert {flag["id"] for flag in client.get("/flags/").json()} == {500, 501}
+
+    # Trailing bytes that are not another gzip member are still rejected
+    response = client.post("/flags/import", content=payload + b"garbage")
+    assert response.status_code == 400
+
+# 23. Rejected writes do not create the environment they were sent to.
+def test_rejected_write_does_not_create_environment(client):
+    response = client.patch("/environments/typo1/flags/toggle/99999")
+    assert response.status_code == 404
+    response = client.post("/environments/typo2/flags/", json={"name": "flag17", "dependencies": [999]})
+    assert response.status_code == 400
+    payload = to_ndjson_gz([
+        {"type": "flag", "id": 1, "name": "cycle1"},
+        {"type": "dependency", "flag_id": 1, "dependent_flag_id": 1},
+    ])
+    response = client.post("/environments/typo3/flags/import", content=payload)
+    assert response.status_code == 400
+    assert {"typo1", "typo2", "typo3"}.isdisjoint(env["name"] for env in client.get("/environments/").json())
+
+    # The first accepted write creates it
+    response = client.post("/environments/typo2/flags/", json={"name": "flag17", "dependencies": []})
+    assert response.status_code == 201
+    assert "typo2" in {env["name"] for env in client.get("/environments/").json()}
+
+# 24. The unprefixed routes always use the default environment and environment names are validated.
+def test_environment_name_handling(client):
+    flag_response = client.post("/flags/", json={"name": "flag18", "dependencies": []})
+    flag_id = flag_response.json()["id"]
+    client.patch(f"/environments/staging/flags/toggle/{flag_id}")
+    
+    # There is no environment query parameter on /flags
+    response = client.get("/flags/", params={"environment": "staging"})
+    assert [flag["is_active"] for flag in response.json() if flag["id"] == flag_id] == [False]
+    response = client.post("/flags/", params={"environment": ""}, json={"name": "flag19", "dependencies": []})
+    assert response.status_code == 201
+    assert "" not in {env["name"] for env in client.get("/environments/").json()}
+    parameters = client.get("/openapi.json").json()["paths"]["/flags/"]["get"].get("parameters", [])
+    assert "environment" not in {parameter["name"] for parameter in parameters}
+    
+    for name in ("Staging", "-staging", "stag%20ing", "x" * 65):
+        response = client.patch(f"/environments/{name}/flags/toggle/{flag_id}")
+        assert response.status_code == 422, name
+    assert {env["name"] for env in client.get("/environments/").json()} <= {"default", "staging"}
+
+# 25. Stores imported audit timestamps with an offset as UTC.
+def test_import_audit_log_timestamps(client):
+    payload = to_ndjson_gz([
+        {"type": "flag", "id": 70, "name": "timestamped"},
+        {"type": "audit_log", "flag_id": 70, "flag_name": "timestamped", "operation": "create",
+         "timestamp": "2025-01-01T00:00:00+05:00"},
+        {"type": "audit_log", "flag_id": 70, "flag_name": "timestamped", "operation": "activate",
+         "timestamp": "2025-01-01T00:00:00"},
+    ])
+    response = client.post("/environments/staging/flags/import", content=payload)
+    assert response.status_code == 201
+    
+    response = client.get("/environments/staging/flags/export", params={"include_audit_logs": True})
+    records = [record for record in from_ndjson_gz(response.content) if record["type"] == "audit_log"]
+    assert [record["timestamp"] for record in records[:2]] == ["2024-12-31T19:00:00", "2025-01-01T00:00:00"]
@@ -0,0 +1,38 @@
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+import os
+
+# Migrated separately from the worker's test schema, which is already at head
+SCHEMA = f"test_{os.getenv('PYTEST_XDIST_WORKER', 'main')}_upgrade"
+
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+
+# 1. Upgrading a pre-environment database keeps its state in the default environment.
+def test_upgrade_moves_state_to_default_environment():
+    engine = create_engine(os.getenv("DATABASE_URL"), connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            config = Config(ALEMBIC_CONFIG)
+            config.attributes["connection"] = connection
+            config.attributes["configure_logger"] = False
+            command.upgrade(config, "0001")
+
+            # Rows as the single-environment service wrote them
+            connection.execute(text("INSERT INTO flags (id, name, is_active) VALUES (1, 'on', true), (2, 'off', false)"))
+            connection.execute(text(
+                "INSERT INTO audit_logs (flag_id, flag_name, operation, timestamp) VALUES (1, 'on', 'activate', now())"
+            ))
+            command.upgrade(config, "head")
+
+            default_id = connection.execute(text("SELECT id FROM environments WHERE name = 'default'")).scalar_one()
+            states = connection.execute(text("SELECT environment_id, flag_id, is_active FROM flag_states")).all()
+            assert states == [(default_id, 1, True)]
+            audit_environments = connection.execute(text("SELECT environment_id FROM audit_logs")).scalars().all()
+            assert audit_environments == [default_id]
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
\ No newline at end of file